@@ -0,0 +1,58 @@
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from api.read_model import refresh_room_documents
+from main.models import Room
+from main.tenancy import scope_filter, tenant_context, tenant_scopes
+
+
+def _init_worker():
+    # При запуске через spawn Django в дочернем процессе еще не настроен
+    django.setup()
+
+
+def _rebuild_chunk(room_ids, scope):
+    with tenant_context(organization_id=scope):
+        refresh_room_documents(room_ids)
+    return len(room_ids)
+
+
+class Command(BaseCommand):
+    help = 'Перестраивает документы модели чтения помещений параллельно, пачками'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--project', type=int, help='Только помещения проекта')
+        parser.add_argument('--workers', type=int, default=None, help='Количество процессов (по умолчанию - число ядер)')
+        parser.add_argument('--chunk-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        # Помещения организаций из TENANT_DATABASES лежат в своих базах, пачки не смешивают организации
+        chunk_size = options['chunk_size']
+        room_count = 0
+        chunks = []
+        for scope in tenant_scopes():
+            with tenant_context(organization_id=scope):
+                rooms = Room.objects.filter(scope_filter(scope, 'project__organization_id')).order_by('pk')
+                if options['project'] is not None:
+                    rooms = rooms.filter(project_id=options['project'])
+                room_ids = list(rooms.values_list('pk', flat=True))
+            room_count += len(room_ids)
+            chunks += [(room_ids[i:i + chunk_size], scope) for i in range(0, len(room_ids), chunk_size)]
+
+        # Дочерние процессы открывают собственные соединения, унаследованные использовать нельзя
+        connections.close_all()
+        start = time.perf_counter()
+        done = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+            futures = [executor.submit(_rebuild_chunk, *chunk) for chunk in chunks]
+            for future in as_completed(futures):
+                done += future.result()
+                self.stdout.write(f"{done}/{room_count}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {done} room documents in {time.perf_counter() - start:.1f} s"
+        ))
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('main', '0007_projectclonetask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RoomDocument',
+            fields=[
+                ('room', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='main.room', verbose_name='Помещение')),
+                ('data', models.JSONField(verbose_name='Данные')),
+            ],
+            options={
+                'verbose_name': 'Документ помещения',
+                'verbose_name_plural': 'Документы помещений',
+            },
+        ),
+    ]
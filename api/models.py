@@ -0,0 +1,17 @@
+from django.db import models
+
+from main.models import Room
+
+
+class RoomDocument(models.Model):
+    """Готовый ответ RoomSerializer для помещения (денормализованная модель чтения)"""
+    room = models.OneToOneField(Room, on_delete=models.CASCADE, primary_key=True, related_name='document',
+                                verbose_name='Помещение')
+    data = models.JSONField('Данные')
+
+    def __str__(self):
+        return str(self.room_id)
+
+    class Meta:
+        verbose_name = 'Документ помещения'
+        verbose_name_plural = 'Документы помещений'
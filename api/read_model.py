@@ -0,0 +1,76 @@
+import contextvars
+import threading
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import QuerySet
+
+from main.models import Room
+from main.signals import defer_room_change
+from .models import RoomDocument
+from .serializers import RoomSerializer
+
+
+def is_enabled():
+    return settings.ROOM_READ_MODEL_ENABLED
+
+
+def refresh_room_documents(rooms):
+    """
+    Пересчитывает документы помещений (queryset или список id) пачками:
+    пачка помещений с объемами читается целиком и сохраняется одним upsert.
+    """
+    if isinstance(rooms, QuerySet):
+        rooms = rooms.values_list('pk', flat=True)
+    room_ids = list(rooms)
+    batch_size = settings.ROOM_READ_MODEL_BATCH_SIZE
+    for i in range(0, len(room_ids), batch_size):
+        batch = Room.objects.filter(pk__in=room_ids[i:i + batch_size]).prefetch_related(
+            'floorworkvolume_volumes',
+            'wallworkvolume_volumes',
+            'ceilingworkvolume_volumes'
+        )
+        _save_documents([RoomDocument(room=room, data=RoomSerializer(room).data) for room in batch])
+
+
+def _save_documents(documents):
+    if documents:
+        RoomDocument.objects.bulk_create(
+            documents, update_conflicts=True, unique_fields=['room'], update_fields=['data']
+        )
+
+
+def schedule_refresh(room_id):
+    """Обновляет документ сразу или, внутри batched_room_changes, один раз в конце блока"""
+    if not defer_room_change(room_id):
+        refresh_room_documents([room_id])
+
+
+def refresh_changed_rooms(rooms):
+    """
+    Обновляет документы помещений, измененных массовой операцией. Небольшой набор
+    (до ROOM_READ_MODEL_SYNC_LIMIT) пересчитывается сразу в той же транзакции. Для большего
+    набора (этаж, проект, пакет с устройства) документы удаляются - до пересчета помещения
+    отдаются обычной сериализацией, - а сам пересчет выполняется в фоновом потоке после фиксации.
+    """
+    if isinstance(rooms, QuerySet):
+        rooms = rooms.values_list('pk', flat=True)
+    room_ids = list(rooms)
+    if len(room_ids) <= settings.ROOM_READ_MODEL_SYNC_LIMIT:
+        refresh_room_documents(room_ids)
+        return
+
+    using = router.db_for_write(RoomDocument)
+    RoomDocument.objects.using(using).filter(room_id__in=room_ids).delete()
+    context = contextvars.copy_context()
+    transaction.on_commit(
+        lambda: threading.Thread(target=context.run, args=(_refresh_in_thread, room_ids), daemon=True).start(),
+        using=using,
+    )
+
+
+def _refresh_in_thread(room_ids):
+    try:
+        refresh_room_documents(room_ids)
+    finally:
+        connections.close_all()
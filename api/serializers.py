@@ -1,5 +1,7 @@
 from rest_framework import serializers
-from main.models import Room, FloorWorkVolume, WorkVolume, WallWorkVolume, CeilingWorkVolume
+from main.aggregates import VOLUME_CATEGORIES
+from main.models import (Room, FloorWorkVolume, WorkVolume, WallWorkVolume, CeilingWorkVolume,
+                         ProjectCloneTask)
 
 
 class FloorWorkVolumeSerializer(serializers.ModelSerializer):
@@ -25,4 +27,29 @@ class RoomSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Room
-        fields = ['id', 'name', 'area', 'floor_volumes', 'wall_volumes', 'ceiling_volumes']
\ No newline at end of file
+        fields = ['id', 'name', 'area', 'floor_volumes', 'wall_volumes', 'ceiling_volumes']
+
+
+class BulkCompletionSerializer(serializers.Serializer):
+    """Условия отбора и новое значение для массового изменения процента выполнения"""
+    completion_percentage = serializers.FloatField(min_value=0, max_value=100)
+    category = serializers.ChoiceField(choices=list(VOLUME_CATEGORIES), required=False)
+    finish_type = serializers.IntegerField(required=False)
+    block = serializers.CharField(max_length=10, required=False)
+    floor = serializers.IntegerField(required=False)
+    dry_run = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'finish_type' in attrs and 'category' not in attrs:
+            raise serializers.ValidationError({'category': 'Required when finish_type is set.'})
+        return attrs
+
+
+class ProjectCloneTaskSerializer(serializers.ModelSerializer):
+    progress = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ProjectCloneTask
+        fields = ['id', 'source', 'target', 'name', 'old_code_prefix', 'new_code_prefix', 'status',
+                  'total', 'processed', 'progress', 'error', 'created_at', 'finished_at']
+        read_only_fields = ['target', 'status', 'total', 'processed', 'error', 'created_at', 'finished_at']
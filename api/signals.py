@@ -0,0 +1,30 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from main.models import Room, FloorWorkVolume, WallWorkVolume, CeilingWorkVolume
+from main.signals import rooms_bulk_changed
+from .read_model import is_enabled, refresh_changed_rooms, schedule_refresh
+
+
+@receiver(post_save, sender=Room)
+def refresh_room_document(sender, instance, **kwargs):
+    if is_enabled():
+        schedule_refresh(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=FloorWorkVolume)
+@receiver([post_save, post_delete], sender=WallWorkVolume)
+@receiver([post_save, post_delete], sender=CeilingWorkVolume)
+def refresh_volume_room_document(sender, instance, **kwargs):
+    # При каскадном удалении помещения документ удаляется вместе с ним
+    origin = kwargs.get('origin')
+    if origin is not None and origin is not instance:
+        return
+    if is_enabled():
+        schedule_refresh(instance.room_id)
+
+
+@receiver(rooms_bulk_changed)
+def refresh_bulk_room_documents(sender, rooms, **kwargs):
+    if is_enabled():
+        refresh_changed_rooms(rooms)
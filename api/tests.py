@@ -0,0 +1,37 @@
+from django.contrib.auth import get_user_model
+
+from main.models import WallWorkVolume
+from main.tests import TENANT_ID, RoutedTenantTestCase
+
+
+class UpdateRoomVolumesTenantTests(RoutedTenantTestCase):
+
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_user('user', password='password')
+        self.client.force_login(user)
+        self.url = f'/api/rooms/{self.room.pk}/update-room/'
+
+    def post(self, data):
+        return self.client.post(self.url, data, content_type='application/json',
+                                headers={'X-Organization-Id': str(TENANT_ID)})
+
+    def test_invalid_category_rolls_back_previous_categories(self):
+        response = self.post({
+            'floor_volumes': [{'floor_type': self.floor_type.pk, 'element_number': 1,
+                               'volume': 99, 'completion_percentage': 50}],
+            'wall_volumes': [{'wall_type': 999, 'element_number': 1, 'volume': 5, 'completion_percentage': 0}],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertFloorVolume(volume=10, completion_percentage=0)
+
+    def test_update_is_written_to_tenant_database(self):
+        response = self.post({
+            'floor_volumes': [{'floor_type': self.floor_type.pk, 'element_number': 1,
+                               'volume': 99, 'completion_percentage': 50}],
+            'wall_volumes': [{'wall_type': self.wall_type.pk, 'element_number': 1,
+                              'volume': 5, 'completion_percentage': 0}],
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertFloorVolume(volume=99, completion_percentage=50)
+        self.assertTrue(WallWorkVolume.objects.using('tenant').filter(room_id=self.room.pk).exists())
@@ -1,7 +1,8 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import RoomViewSet
+from .views import RoomViewSet, ProjectCloneTaskViewSet
 
 router = DefaultRouter()
 router.register(r'rooms', RoomViewSet, basename='room')
+router.register(r'clone-tasks', ProjectCloneTaskViewSet, basename='clone-task')
 urlpatterns = router.urls
\ No newline at end of file
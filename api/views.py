@@ -1,19 +1,96 @@
-from rest_framework import status
+import os
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import router, transaction
+from django.http import FileResponse, HttpResponse
+from django.utils.http import parse_etags
+from rest_framework import mixins, status
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from rest_framework.generics import get_object_or_404
 from rest_framework.response import Response
-from rest_framework.viewsets import ModelViewSet
-from main.models import Room, FloorWorkVolume, CeilingWorkVolume, WallWorkVolume
+from rest_framework.viewsets import ModelViewSet, GenericViewSet
+from main.aggregates import floor_grid
+from main.bulk import bulk_set_completion
+from main.bundles import BundleError, apply_diff_bundle, bundle_path, open_bundle
+from main.cloning import start_clone_task
+from main.models import Room, Project, FloorWorkVolume, CeilingWorkVolume, WallWorkVolume, ProjectCloneTask
+from main.signals import rooms_bulk_changed
+from .read_model import is_enabled as read_model_enabled
 from .serializers import (RoomSerializer, FloorWorkVolumeSerializer, WallWorkVolumeSerializer,
-                          CeilingWorkVolumeSerializer)
+                          CeilingWorkVolumeSerializer, BulkCompletionSerializer, ProjectCloneTaskSerializer)
+
+
+def range_file_response(request, file, content_type, etag, filename):
+    """
+    Отдает открытый файл целиком или запрошенный диапазон (один диапазон байт из заголовка Range),
+    чтобы прерванную загрузку можно было продолжить. Если If-Range не совпадает с текущим ETag
+    (файл сменился), отдается весь файл.
+    """
+    size = os.fstat(file.fileno()).st_size
+    match = re.fullmatch(r'bytes=(\d*)-(\d*)', request.headers.get('Range', ''))
+    if_range = request.headers.get('If-Range')
+    if match is None or match.groups() == ('', '') or (if_range is not None and if_range != etag):
+        response = FileResponse(file, content_type=content_type)
+    else:
+        with file:
+            start, end = match.groups()
+            if start:
+                start, end = int(start), min(int(end), size - 1) if end else size - 1
+            else:
+                start, end = max(size - int(end), 0), size - 1
+            if start > end or start >= size:
+                response = HttpResponse(status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+                response['Content-Range'] = f'bytes */{size}'
+                return response
+            file.seek(start)
+            response = HttpResponse(file.read(end - start + 1), content_type=content_type,
+                                    status=status.HTTP_206_PARTIAL_CONTENT)
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    response['Accept-Ranges'] = 'bytes'
+    response['ETag'] = etag
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+class TenantScopedMixin:
+    """Ограничивает queryset организацией и проектом текущего запроса"""
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tenant = getattr(self.request, 'tenant', None)
+        if tenant is None:
+            return queryset
+        return queryset.for_tenant(tenant.organization_id, tenant.project_id)
+
+    def get_project(self):
+        """Проект из параметра ?project= или заголовка X-Project-Id в пределах организации запроса"""
+        tenant = getattr(self.request, 'tenant', None)
+        # Тело запроса может быть не объектом (например, JSON-массивом)
+        data = self.request.data if isinstance(self.request.data, dict) else {}
+        project_id = (self.request.query_params.get('project') or data.get('project')
+                      or (tenant and tenant.project_id))
+        if not project_id:
+            raise ValidationError({'project': 'This parameter is required.'})
+        try:
+            project_id = int(project_id)
+        except (TypeError, ValueError):
+            raise ValidationError({'project': 'A valid integer is required.'})
+        projects = Project.objects.all()
+        if tenant is not None and tenant.organization_id is not None:
+            projects = projects.filter(organization_id=tenant.organization_id)
+        return get_object_or_404(projects, pk=project_id)
 
 
-class FloorWorkVolumeViewSet(ModelViewSet):
+class FloorWorkVolumeViewSet(TenantScopedMixin, ModelViewSet):
     queryset = FloorWorkVolume.objects.all()
     serializer_class = FloorWorkVolumeSerializer
 
 
-class RoomViewSet(ModelViewSet):
+class RoomViewSet(TenantScopedMixin, ModelViewSet):
     queryset = Room.objects.all()
     serializer_class = RoomSerializer
 
@@ -28,50 +105,173 @@ class RoomViewSet(ModelViewSet):
             'ceilingworkvolume_volumes'
         )
 
+    def list(self, request, *args, **kwargs):
+        """При включенной модели чтения отдает готовые документы, недостающие сериализует как обычно"""
+        if not read_model_enabled():
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = list(queryset.order_by('pk').values_list('pk', 'document__data'))
+        missing = [pk for pk, data in rows if data is None]
+        if missing:
+            serialized = {room.pk: self.get_serializer(room).data for room in queryset.filter(pk__in=missing)}
+            rows = [(pk, serialized[pk] if data is None else data) for pk, data in rows]
+        return Response([data for pk, data in rows])
+
+    def retrieve(self, request, *args, **kwargs):
+        if not read_model_enabled():
+            return super().retrieve(request, *args, **kwargs)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        data = get_object_or_404(
+            self.filter_queryset(self.get_queryset()).values_list('document__data', flat=True),
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        if data is None:
+            return super().retrieve(request, *args, **kwargs)
+        return Response(data)
+
+    @action(detail=False, methods=['get'], url_path='grid')
+    def grid(self, request):
+        """Сводка по проекту в разрезе здание × этаж, кэшируется до следующего изменения проекта"""
+        project = self.get_project()
+        cache_key = f'floor-grid:{project.pk}:{project.version}'
+        cells = cache.get(cache_key)
+        if cells is None:
+            cells = floor_grid(project.pk)
+            cache.set(cache_key, cells, settings.FLOOR_GRID_CACHE_TIMEOUT)
+        return Response({'project': project.pk, 'version': project.version, 'cells': cells})
+
+    @action(detail=False, methods=['post'], url_path='bulk-completion')
+    def bulk_completion(self, request):
+        """
+        Массовая установка процента выполнения по условиям (категория, тип отделки, здание, этаж).
+        С dry_run возвращает только количество подходящих записей.
+        """
+        project = self.get_project()
+        serializer = BulkCompletionSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+        affected = bulk_set_completion(
+            project,
+            data['completion_percentage'],
+            category=data.get('category'),
+            finish_type_id=data.get('finish_type'),
+            block=data.get('block'),
+            floor=data.get('floor'),
+            user=request.user,
+            dry_run=data['dry_run'],
+        )
+        return Response({'dry_run': data['dry_run'], 'affected': affected}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get', 'post'], url_path='bundle')
+    def bundle(self, request):
+        """
+        GET - офлайн-пакет проекта (SQLite, сжатый gzip) с поддержкой ETag и Range.
+        POST - применение пакета изменений с устройства (файл в поле bundle).
+        """
+        project = self.get_project()
+        if request.method == 'POST':
+            uploaded_file = request.FILES.get('bundle')
+            if uploaded_file is None:
+                raise ValidationError({'bundle': 'No file was submitted.'})
+            try:
+                applied = apply_diff_bundle(project, uploaded_file)
+            except BundleError as e:
+                raise ValidationError({'bundle': str(e)})
+            project.refresh_from_db(fields=['version'])
+            return Response({'applied': applied, 'version': project.version}, status=status.HTTP_200_OK)
+
+        etag = f'"project-{project.pk}-v{project.version}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
+        return range_file_response(request, open_bundle(project), 'application/gzip', etag,
+                                   bundle_path(project).name)
+
     @action(detail=True, methods=['post', 'patch', 'get'], url_path='update-room')
     def update_room_volumes(self, request, pk=None):
         """Обновление объемов для комнаты (пол, стены, потолок)"""
         room = self.get_object()
+        if not isinstance(request.data, dict):
+            raise ValidationError({'non_field_errors': ['Expected an object.']})
 
-        # Получение данных для обновления
-        floor_data = request.data.get('floor_volumes', [])
-        wall_data = request.data.get('wall_volumes', [])
-        ceiling_data = request.data.get('ceiling_volumes', [])
+        # Транзакция открывается в базе, куда маршрутизируются данные организации, а не в 'default'
+        with transaction.atomic(using=router.db_for_write(Room)):
+            # Обновление объемов пола, стен и потолков: один INSERT ... ON CONFLICT DO UPDATE на категорию
+            updated = 0
+            for key, model, type_field in (
+                ('floor_volumes', FloorWorkVolume, 'floor_type'),
+                ('wall_volumes', WallWorkVolume, 'wall_type'),
+                ('ceiling_volumes', CeilingWorkVolume, 'ceiling_type'),
+            ):
+                updated += self._upsert_volumes(room, model, type_field, request.data.get(key, []))
 
-        # Обновление объемов для пола
-        for data in floor_data:
-            try:
-                FloorWorkVolume.objects.update_or_create(
-                    room=room,
-                    floor_type_id=data['floor_type'],  # Используем поля для поиска
-                    element_number=data['element_number'],
-                    defaults={'volume': data['volume'], 'completion_percentage': data['completion_percentage']}
-                )
-            except KeyError as e:
-                raise ValidationError(f"Missing field: {e}")
+            if updated:
+                # bulk_create не вызывает сигналы, поэтому версию проекта и документ помещения обновляем явно
+                Project.objects.filter(pk=room.project_id).bump_version()
+                rooms_bulk_changed.send(sender=Room, rooms=Room.objects.filter(pk=room.pk))
 
-        # Обновление объемов для стен
-        for data in wall_data:
-            try:
-                WallWorkVolume.objects.update_or_create(
-                    room=room,
-                    wall_type_id=data['wall_type'],  # Используем поля для поиска
-                    element_number=data['element_number'],
-                    defaults={'volume': data['volume'], 'completion_percentage': data['completion_percentage']}
-                )
-            except KeyError as e:
-                raise ValidationError(f"Missing field: {e}")
+        return Response({'status': 'volumes updated'}, status=status.HTTP_200_OK)
 
-        # Обновление объемов для потолков
-        for data in ceiling_data:
+    @staticmethod
+    def _upsert_volumes(room, model, type_field, items):
+        # Ключ (помещение, тип, номер элемента) уникален, повтор в запросе перезаписывает предыдущее значение
+        type_model_field = model._meta.get_field(type_field)
+        volumes = {}
+        for data in items:
             try:
-                CeilingWorkVolume.objects.update_or_create(
+                volume = model(
                     room=room,
-                    ceiling_type_id=data['ceiling_type'],  # Используем поля для поиска
                     element_number=data['element_number'],
-                    defaults={'volume': data['volume'], 'completion_percentage': data['completion_percentage']}
+                    volume=data['volume'],
+                    completion_percentage=data['completion_percentage'],
+                    **{f'{type_field}_id': type_model_field.to_python(data[type_field])}  # Используем поля для поиска
                 )
             except KeyError as e:
                 raise ValidationError(f"Missing field: {e}")
+            except DjangoValidationError as e:
+                raise ValidationError({type_field: e.messages})
+            try:
+                volume.clean_fields(exclude=['room', type_field])
+            except DjangoValidationError as e:
+                raise ValidationError(e.message_dict)
+            if getattr(volume, f'{type_field}_id') is None:
+                raise ValidationError({type_field: 'This field may not be null.'})
+            volumes[(getattr(volume, f'{type_field}_id'), volume.element_number)] = volume
 
-        return Response({'status': 'volumes updated'}, status=status.HTTP_200_OK)
+        # Типы отделки проверяем одним запросом, а не построчно в clean_fields
+        type_ids = {type_id for type_id, _ in volumes}
+        unknown = type_ids - set(
+            type_model_field.related_model.objects.filter(pk__in=type_ids).values_list('pk', flat=True)
+        )
+        if unknown:
+            raise ValidationError({type_field: f"Unknown ids: {sorted(unknown)}"})
+
+        model.objects.bulk_create(
+            volumes.values(),
+            update_conflicts=True,
+            unique_fields=['room', type_field, 'element_number'],
+            update_fields=['volume', 'completion_percentage'],
+        )
+        return len(volumes)
+
+
+class ProjectCloneTaskViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                              GenericViewSet):
+    """Запуск копирования проекта в фоне и просмотр прогресса задач"""
+    queryset = ProjectCloneTask.objects.select_related('source').order_by('-created_at')
+    serializer_class = ProjectCloneTaskSerializer
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        tenant = getattr(self.request, 'tenant', None)
+        if tenant is not None and tenant.organization_id is not None:
+            queryset = queryset.filter(source__organization_id=tenant.organization_id)
+        return queryset
+
+    def perform_create(self, serializer):
+        tenant = getattr(self.request, 'tenant', None)
+        source = serializer.validated_data['source']
+        if tenant is not None and tenant.organization_id not in (None, source.organization_id):
+            raise ValidationError({'source': 'Project does not belong to the organization.'})
+        start_clone_task(serializer.save())
@@ -3,9 +3,11 @@ from import_export.admin import ImportExportModelAdmin
 from .models import (
     Room, FloorType, FloorWorkVolume,
     WallType, WallWorkVolume,
-    CeilingType, CeilingWorkVolume, Organization, Project
+    CeilingType, CeilingWorkVolume, Organization, Project,
+    BulkCompletionUpdate, ProjectCloneTask
 )
 from import_export import resources
+from .signals import batched_room_changes
 
 
 # Resource для импорта/экспорта комнат
@@ -63,6 +65,11 @@ class RoomAdmin(ImportExportModelAdmin):
     list_filter = ('block', 'floor')
     inlines = [FloorWorkVolumeInline, WallWorkVolumeInline, CeilingWorkVolumeInline]
 
+    def save_related(self, request, form, formsets, change):
+        # Объемы из inline-форм сохраняются по одному, сигналы о помещении отправляем один раз
+        with batched_room_changes(sender=Room):
+            super().save_related(request, form, formsets, change)
+
 
 # Админка для типов отделки
 @admin.register(FloorType)
@@ -117,4 +124,21 @@ class Project(admin.ModelAdmin):
     list_display = ('name', 'organization')
 
 
+@admin.register(BulkCompletionUpdate)
+class BulkCompletionUpdateAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'project', 'user', 'completion_percentage', 'selector', 'affected_rows')
+    list_filter = ('project',)
+    readonly_fields = ('created_at', 'project', 'user', 'selector', 'completion_percentage', 'affected_rows')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
 
+@admin.register(ProjectCloneTask)
+class ProjectCloneTaskAdmin(admin.ModelAdmin):
+    list_display = ('source', 'name', 'target', 'status', 'processed', 'total', 'created_at', 'finished_at')
+    list_filter = ('status',)
+    readonly_fields = ('target', 'status', 'total', 'processed', 'error', 'created_at', 'finished_at')
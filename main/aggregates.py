@@ -0,0 +1,52 @@
+from django.db.models import Count, F, FloatField, Sum
+
+from .models import Room, FloorWorkVolume, WallWorkVolume, CeilingWorkVolume
+
+# Категории отделки и соответствующие модели объемов
+VOLUME_CATEGORIES = {
+    'floor': FloorWorkVolume,
+    'wall': WallWorkVolume,
+    'ceiling': CeilingWorkVolume,
+}
+
+
+def completed_volume_sum():
+    """Сумма выполненного объема, считается в БД (аналог WorkVolume.completed_volume)"""
+    return Sum(F('volume') * F('completion_percentage') / 100, output_field=FloatField())
+
+
+def floor_grid(project_id):
+    """
+    Сводка по проекту в разрезе (здание, этаж): количество помещений, площадь
+    и общий/выполненный объем по каждой категории отделки.
+    Один сгруппированный запрос на помещения и по одному на каждую категорию.
+    """
+    cells = {}
+    rooms = (
+        Room.objects.filter(project_id=project_id)
+        .values('block', 'floor')
+        .annotate(room_count=Count('id'), area=Sum('area'))
+        .order_by('block', 'floor')
+    )
+    for row in rooms:
+        cells[(row['block'], row['floor'])] = {
+            'block': row['block'],
+            'floor': row['floor'],
+            'room_count': row['room_count'],
+            'area': row['area'] or 0,
+            'volumes': {category: {'total': 0, 'completed': 0} for category in VOLUME_CATEGORIES},
+        }
+
+    for category, model in VOLUME_CATEGORIES.items():
+        volumes = (
+            model.objects.filter(room__project_id=project_id)
+            .values('room__block', 'room__floor')
+            .annotate(total=Sum('volume'), completed=completed_volume_sum())
+            .order_by()
+        )
+        for row in volumes:
+            cell = cells.get((row['room__block'], row['room__floor']))
+            if cell is not None:
+                cell['volumes'][category] = {'total': row['total'] or 0, 'completed': row['completed'] or 0}
+
+    return list(cells.values())
@@ -0,0 +1,57 @@
+from django.db import router, transaction
+
+from .aggregates import VOLUME_CATEGORIES
+from .models import Project, Room, BulkCompletionUpdate
+from .signals import rooms_bulk_changed
+
+
+def bulk_set_completion(project, completion_percentage, category=None, finish_type_id=None,
+                        block=None, floor=None, user=None, dry_run=False):
+    """
+    Устанавливает процент выполнения всем объемам проекта, подходящим под условия.
+    Один UPDATE ... WHERE на каждую категорию отделки. При dry_run только считает записи.
+    Возвращает количество затронутых записей по категориям.
+    """
+    categories = [category] if category else list(VOLUME_CATEGORIES)
+    selector = {'category': category, 'finish_type': finish_type_id, 'block': block, 'floor': floor}
+
+    rooms = Room.objects.filter(project=project)
+    if block is not None:
+        rooms = rooms.filter(block=block)
+    if floor is not None:
+        rooms = rooms.filter(floor=floor)
+
+    querysets = {}
+    for name in categories:
+        queryset = VOLUME_CATEGORIES[name].objects.filter(room__project=project)
+        if finish_type_id is not None:
+            queryset = queryset.filter(**{f'{name}_type_id': finish_type_id})
+        if block is not None:
+            queryset = queryset.filter(room__block=block)
+        if floor is not None:
+            queryset = queryset.filter(room__floor=floor)
+        querysets[name] = queryset
+
+    if finish_type_id is not None:
+        rooms = rooms.filter(pk__in=querysets[category].values('room_id'))
+
+    if dry_run:
+        return {name: queryset.count() for name, queryset in querysets.items()}
+
+    # Без using atomic открывается на 'default', а данные организации могут лежать в другой базе
+    with transaction.atomic(using=router.db_for_write(BulkCompletionUpdate)):
+        affected = {
+            name: queryset.update(completion_percentage=completion_percentage)
+            for name, queryset in querysets.items()
+        }
+        BulkCompletionUpdate.objects.create(
+            project=project,
+            user=user if user is not None and user.is_authenticated else None,
+            selector=selector,
+            completion_percentage=completion_percentage,
+            affected_rows=affected,
+        )
+        # update() не вызывает сигналы, поэтому версию проекта (и кэши по ней) сбрасываем явно
+        Project.objects.filter(pk=project.pk).bump_version()
+        rooms_bulk_changed.send(sender=BulkCompletionUpdate, rooms=rooms)
+    return affected
@@ -0,0 +1,200 @@
+import gzip
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DataError, IntegrityError, router, transaction
+from django.utils import timezone
+
+from .aggregates import VOLUME_CATEGORIES
+from .models import Project, Room, FloorType, WallType, CeilingType
+from .signals import rooms_bulk_changed
+
+# Версия формата файла, меняется при несовместимом изменении схемы
+BUNDLE_FORMAT = 1
+
+TYPE_MODELS = {
+    'floor': FloorType,
+    'wall': WallType,
+    'ceiling': CeilingType,
+}
+
+ROOM_COLUMNS = ('id', 'code', 'block', 'floor', 'room_number', 'name', 'area')
+TYPE_COLUMNS = ('id', 'type_code', 'description', 'rough_finish', 'clean_finish')
+VOLUME_COLUMNS = ('id', 'room_id', 'element_number', 'volume', 'completion_percentage', 'unit')
+
+
+class BundleError(Exception):
+    """Некорректный файл пакета"""
+
+
+def bundle_path(project):
+    # id проектов в базах разных организаций могут совпадать, поэтому у каждой базы свой каталог
+    alias = router.db_for_read(Project)
+    return Path(settings.BUNDLE_ROOT) / alias / f'project-{project.pk}-v{project.version}.sqlite.gz'
+
+
+def open_bundle(project):
+    """
+    Возвращает открытый файл пакета текущей версии проекта. Пакет строится только при изменении
+    версии проекта, иначе отдается уже готовый файл. Открытый файл остается доступным, даже если
+    параллельный запрос удалит его при сборке следующей версии.
+    Одну версию собирает один запрос (блокировка через cache.add), остальные ждут готового файла
+    не дольше BUNDLE_BUILD_TIMEOUT. Между процессами блокировка работает при общем кэше.
+    """
+    path = bundle_path(project)
+    lock_key = f'bundle-build:{path.parent.name}:{path.name}'
+    deadline = time.monotonic() + settings.BUNDLE_BUILD_TIMEOUT
+    while True:
+        try:
+            return open(path, 'rb')
+        except FileNotFoundError:
+            pass
+        if cache.add(lock_key, True, settings.BUNDLE_BUILD_TIMEOUT):
+            try:
+                return build_bundle(project, path)
+            finally:
+                cache.delete(lock_key)
+        if time.monotonic() > deadline:
+            # Сборщик, скорее всего, упал, не сняв блокировку: собираем сами
+            return build_bundle(project, path)
+        time.sleep(0.2)
+
+
+def build_bundle(project, path):
+    """Пишет помещения, типы отделки и объемы проекта в SQLite-файл, сжимает его gzip и возвращает открытым"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=path.parent) as tmp:
+        db_path = os.path.join(tmp, 'bundle.sqlite')
+        db = sqlite3.connect(db_path)
+        try:
+            db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            db.executemany('INSERT INTO meta VALUES (?, ?)', [
+                ('format', str(BUNDLE_FORMAT)),
+                ('project_id', str(project.pk)),
+                ('project_name', project.name),
+                ('version', str(project.version)),
+                ('generated_at', timezone.now().isoformat()),
+            ])
+            _write_table(db, 'rooms', ROOM_COLUMNS,
+                         Room.objects.filter(project=project).order_by('pk').values_list(*ROOM_COLUMNS))
+            for category, model in VOLUME_CATEGORIES.items():
+                _write_table(db, f'{category}_types', TYPE_COLUMNS,
+                             TYPE_MODELS[category].objects.order_by('pk').values_list(*TYPE_COLUMNS))
+                columns = VOLUME_COLUMNS + (f'{category}_type_id',)
+                _write_table(db, f'{category}_volumes', columns,
+                             model.objects.filter(room__project=project).order_by('pk').values_list(*columns))
+            db.commit()
+        finally:
+            db.close()
+
+        compressed = os.path.join(tmp, 'bundle.sqlite.gz')
+        with open(db_path, 'rb') as src, gzip.open(compressed, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        bundle = open(compressed, 'rb')
+        os.replace(compressed, path)
+
+    # Пакеты прошлых версий больше не нужны. Более новые не трогаем: медленная сборка
+    # устаревшей версии не должна удалить пакет, собранный после нее.
+    for old in path.parent.glob(f'project-{project.pk}-v*.sqlite.gz'):
+        match = re.fullmatch(rf'project-{project.pk}-v(\d+)\.sqlite\.gz', old.name)
+        if match and int(match[1]) < project.version:
+            old.unlink(missing_ok=True)
+    return bundle
+
+
+def _write_table(db, table, columns, rows):
+    db.execute(f'CREATE TABLE {table} ({", ".join(columns)})')
+    db.executemany(
+        f'INSERT INTO {table} VALUES ({", ".join("?" * len(columns))})',
+        rows.iterator(chunk_size=settings.BUNDLE_CHUNK_SIZE),
+    )
+
+
+def apply_diff_bundle(project, uploaded_file):
+    """
+    Применяет пакет изменений с устройства: таблицы <категория>_volumes с ключом
+    (room_id, <категория>_type_id, element_number). Объемы чужих помещений игнорируются.
+    Распакованный файл ограничен BUNDLE_MAX_UPLOAD_SIZE байт.
+    Возвращает количество примененных записей по категориям.
+    """
+    with tempfile.NamedTemporaryFile(suffix='.sqlite') as tmp:
+        head = uploaded_file.read(2)
+        uploaded_file.seek(0)
+        source = gzip.open(uploaded_file) if head == b'\x1f\x8b' else uploaded_file
+        try:
+            _copy_limited(source, tmp, settings.BUNDLE_MAX_UPLOAD_SIZE)
+        except (OSError, EOFError) as e:
+            raise BundleError(f'Cannot read bundle: {e}')
+        tmp.flush()
+
+        db = sqlite3.connect(tmp.name)
+        try:
+            return _apply_volumes(project, db)
+        except (sqlite3.DatabaseError, IntegrityError, DataError, ValueError, TypeError) as e:
+            raise BundleError(f'Invalid bundle: {e}')
+        finally:
+            db.close()
+
+
+def _copy_limited(source, target, limit):
+    # Сжатый файл может распаковаться в гигабайты, поэтому размер проверяется по ходу копирования
+    copied = 0
+    while chunk := source.read(1024 * 1024):
+        copied += len(chunk)
+        if copied > limit:
+            raise BundleError(f'Bundle is larger than {limit} bytes')
+        target.write(chunk)
+
+
+def _apply_volumes(project, db):
+    tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    room_ids = set(Room.objects.filter(project=project).values_list('pk', flat=True))
+    applied = {}
+    changed_rooms = set()
+    # Транзакция открывается в базе, куда маршрутизируются данные организации, а не в 'default'
+    with transaction.atomic(using=router.db_for_write(Room)):
+        for category, model in VOLUME_CATEGORIES.items():
+            table = f'{category}_volumes'
+            if table not in tables:
+                continue
+            type_field = f'{category}_type_id'
+            rows = db.execute(
+                f'SELECT room_id, {type_field}, element_number, volume, completion_percentage FROM {table}'
+            )
+            volumes = {}
+            for room_id, type_id, element_number, volume, completion_percentage in rows:
+                if room_id in room_ids:
+                    volumes[(room_id, type_id, element_number)] = model(
+                        room_id=room_id,
+                        element_number=element_number,
+                        volume=volume,
+                        completion_percentage=completion_percentage,
+                        **{type_field: type_id}
+                    )
+            # Типы отделки проверяем заранее, чтобы вместо ошибки внешнего ключа вернуть понятное сообщение
+            type_ids = {type_id for _, type_id, _ in volumes}
+            known = TYPE_MODELS[category].objects.filter(pk__in=type_ids).values_list('pk', flat=True)
+            unknown = type_ids - set(known)
+            if unknown:
+                raise BundleError(f'Unknown {category} types: {sorted(unknown, key=str)}')
+            model.objects.bulk_create(
+                volumes.values(),
+                batch_size=settings.BUNDLE_CHUNK_SIZE,
+                update_conflicts=True,
+                unique_fields=['room', f'{category}_type', 'element_number'],
+                update_fields=['volume', 'completion_percentage'],
+            )
+            applied[category] = len(volumes)
+            changed_rooms.update(room_id for room_id, _, _ in volumes)
+
+        if changed_rooms:
+            Project.objects.filter(pk=project.pk).bump_version()
+            rooms_bulk_changed.send(sender=Project, rooms=Room.objects.filter(pk__in=changed_rooms))
+    return applied
@@ -0,0 +1,164 @@
+import contextvars
+import threading
+
+from django.conf import settings
+from django.db import connections, models, router, transaction
+from django.utils import timezone
+
+from .aggregates import VOLUME_CATEGORIES
+from .models import Project, Room, ProjectCloneTask
+from .signals import rooms_bulk_changed
+
+ROOM_FIELDS = ('id', 'code', 'block', 'floor', 'room_number', 'name', 'area')
+
+
+def remap_code(code, old_prefix, new_prefix):
+    """Заменяет префикс кода помещения (или добавляет новый, если старого нет)"""
+    if old_prefix and code.startswith(old_prefix):
+        code = code[len(old_prefix):]
+    return f"{new_prefix}{code}"
+
+
+def _insert_rows(model, columns, rows):
+    """
+    Вставляет готовые строки одним executemany. Для объемов это в разы быстрее bulk_create,
+    так как значения полей не проходят подготовку через ORM.
+    """
+    if not rows:
+        return 0
+    connection = connections[router.db_for_write(model)]
+    quote_name = connection.ops.quote_name
+    sql = 'INSERT INTO {table} ({columns}) VALUES ({values})'.format(
+        table=quote_name(model._meta.db_table),
+        columns=', '.join(quote_name(model._meta.get_field(name).column) for name in columns),
+        values=', '.join(['%s'] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, rows)
+    return len(rows)
+
+
+def clone_project(task, chunk_size=None, on_progress=None):
+    """
+    Копирует помещения и объемы исходного проекта в новый проект пачками: помещения через
+    bulk_create (нужны новые id), объемы - пакетной вставкой готовых строк.
+    Процент выполнения у копий сбрасывается: новый объект начинается с нуля.
+    Прогресс сохраняется в задаче после каждой пачки.
+    """
+    chunk_size = chunk_size or settings.CLONE_CHUNK_SIZE
+    source = task.source
+    rooms = Room.objects.filter(project=source)
+
+    task.total = rooms.count() + sum(
+        model.objects.filter(room__project=source).count() for model in VOLUME_CATEGORIES.values()
+    )
+    task.target = Project.objects.create(name=task.name, organization_id=source.organization_id)
+    task.save(update_fields=['total', 'target'])
+
+    last_pk = 0
+    while True:
+        chunk = list(rooms.filter(pk__gt=last_pk).order_by('pk').values(*ROOM_FIELDS)[:chunk_size])
+        if not chunk:
+            break
+        first_pk, last_pk = chunk[0]['id'], chunk[-1]['id']
+
+        with transaction.atomic(using=router.db_for_write(Room)):
+            new_rooms = Room.objects.bulk_create([
+                Room(
+                    project=task.target,
+                    code=remap_code(row['code'], task.old_code_prefix, task.new_code_prefix),
+                    block=row['block'],
+                    floor=row['floor'],
+                    room_number=row['room_number'],
+                    name=row['name'],
+                    area=row['area'],
+                )
+                for row in chunk
+            ])
+            room_ids = {row['id']: room.pk for row, room in zip(chunk, new_rooms)}
+            copied = len(new_rooms)
+
+            for category, model in VOLUME_CATEGORIES.items():
+                type_field = f'{category}_type_id'
+                volumes = (
+                    model.objects.filter(room__project=source, room_id__gte=first_pk, room_id__lte=last_pk)
+                    .values_list('room_id', 'element_number', 'volume', 'unit', type_field)
+                )
+                copied += _insert_rows(
+                    model,
+                    ('room_id', 'element_number', 'volume', 'completion_percentage', 'unit', type_field),
+                    [(room_ids[room_id], number, volume, 0, unit, type_id)
+                     for room_id, number, volume, unit, type_id in volumes.iterator(chunk_size=chunk_size)],
+                )
+
+            rooms_bulk_changed.send(sender=ProjectCloneTask, rooms=Room.objects.filter(pk__in=room_ids.values()))
+
+        task.processed += copied
+        ProjectCloneTask.objects.filter(pk=task.pk).update(processed=task.processed)
+        if on_progress is not None:
+            on_progress(task)
+
+    # bulk_create не вызывает сигналы, поэтому версию нового проекта увеличиваем явно
+    Project.objects.filter(pk=task.target.pk).bump_version()
+    return task.target
+
+
+def _delete_project(project_id):
+    """
+    Удаляет проект без сбора и сигналов по каждой строке: зависимые от помещений таблицы
+    и сами помещения удаляются по одному запросу на таблицу.
+    """
+    using = router.db_for_write(Room)
+    with transaction.atomic(using=using):
+        for relation in Room._meta.related_objects:
+            if relation.on_delete is models.CASCADE:
+                relation.related_model._base_manager.filter(
+                    **{f'{relation.field.name}__project_id': project_id}
+                )._raw_delete(using)
+        Room._base_manager.filter(project_id=project_id)._raw_delete(using)
+        Project.objects.filter(pk=project_id).delete()
+
+
+def _fail_task(task_id, error):
+    """Отмечает задачу как завершенную с ошибкой и удаляет частично созданный проект"""
+    target_id = ProjectCloneTask.objects.filter(pk=task_id).values_list('target_id', flat=True).first()
+    ProjectCloneTask.objects.filter(pk=task_id).update(
+        status=ProjectCloneTask.FAILED, error=str(error), target=None, finished_at=timezone.now()
+    )
+    if target_id is not None:
+        _delete_project(target_id)
+
+
+def run_clone_task(task_id, chunk_size=None, on_progress=None):
+    """Выполняет задачу копирования, при любой ошибке отмечает ее как FAILED"""
+    try:
+        task = ProjectCloneTask.objects.select_related('source').get(pk=task_id)
+        task.status = ProjectCloneTask.RUNNING
+        task.save(update_fields=['status'])
+        clone_project(task, chunk_size=chunk_size, on_progress=on_progress)
+        task.status = ProjectCloneTask.DONE
+        task.finished_at = timezone.now()
+        task.save(update_fields=['status', 'finished_at'])
+    except Exception as e:
+        _fail_task(task_id, e)
+    return ProjectCloneTask.objects.select_related('source', 'target').filter(pk=task_id).first()
+
+
+def _run_in_thread(task_id):
+    try:
+        run_clone_task(task_id)
+    finally:
+        connections.close_all()
+
+
+def start_clone_task(task):
+    """
+    Запускает копирование в фоновом потоке после фиксации транзакции, создавшей задачу.
+    Поток выполняется в копии текущего контекста, чтобы маршрутизация по организации
+    направляла его запросы в ту же базу, что и запрос, создавший задачу.
+    """
+    context = contextvars.copy_context()
+    transaction.on_commit(
+        lambda: threading.Thread(target=context.run, args=(_run_in_thread, task.pk), daemon=True).start(),
+        using=router.db_for_write(ProjectCloneTask),
+    )
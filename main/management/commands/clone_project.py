@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from main.cloning import run_clone_task
+from main.models import Project, ProjectCloneTask
+
+
+class Command(BaseCommand):
+    help = 'Копирует проект со всеми помещениями и объемами отделки'
+
+    def add_arguments(self, parser):
+        parser.add_argument('project_id', type=int)
+        parser.add_argument('name', help='Название нового проекта')
+        parser.add_argument('--new-prefix', required=True, help='Новый префикс кодов помещений')
+        parser.add_argument('--old-prefix', default='', help='Заменяемый префикс кодов помещений')
+        parser.add_argument('--chunk-size', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            source = Project.objects.get(pk=options['project_id'])
+        except Project.DoesNotExist:
+            raise CommandError(f"Project {options['project_id']} does not exist")
+
+        task = ProjectCloneTask.objects.create(
+            source=source,
+            name=options['name'],
+            old_code_prefix=options['old_prefix'],
+            new_code_prefix=options['new_prefix'],
+        )
+        task = run_clone_task(
+            task.pk,
+            chunk_size=options['chunk_size'],
+            on_progress=lambda t: self.stdout.write(f"{t.processed}/{t.total} ({t.progress}%)"),
+        )
+        if task.status == ProjectCloneTask.FAILED:
+            raise CommandError(task.error)
+        self.stdout.write(self.style.SUCCESS(f"Project {task.target.pk} created from {source.pk}"))
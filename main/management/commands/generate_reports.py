@@ -0,0 +1,144 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from main.aggregates import VOLUME_CATEGORIES, floor_grid
+from main.models import Project
+from main.tenancy import scope_filter, tenant_context, tenant_scopes
+
+CATEGORY_TITLES = {'floor': 'Пол', 'wall': 'Стены', 'ceiling': 'Потолки'}
+
+HEADER = (
+    ['Организация', 'Проект', 'Здание', 'Этаж', 'Помещений', 'Площадь']
+    + [f'{CATEGORY_TITLES[category]}, {title}' for category in VOLUME_CATEGORIES for title in ('всего', 'выполнено')]
+    + ['Выполнение, %']
+)
+
+
+def _init_worker():
+    # При запуске через spawn Django в дочернем процессе еще не настроен
+    django.setup()
+
+
+def _completion(total, completed):
+    return round(completed * 100 / total, 1) if total else 0
+
+
+def _row(organization, project, block, floor, room_count, area, volumes):
+    total = sum(volume['total'] for volume in volumes.values())
+    completed = sum(volume['completed'] for volume in volumes.values())
+    values = []
+    for category in VOLUME_CATEGORIES:
+        values += [round(volumes[category]['total'], 2), round(volumes[category]['completed'], 2)]
+    return [organization, project, block, floor, room_count, round(area, 2)] + values + [_completion(total, completed)]
+
+
+def _project_report(project_id, project_name, organization_name, scope):
+    """Строки отчета по проекту: по одной на (здание, этаж) и итоговая. Выполняется в рабочем процессе."""
+    start = time.perf_counter()
+    with tenant_context(organization_id=scope):
+        cells = floor_grid(project_id)
+    rows = []
+    totals = {category: {'total': 0, 'completed': 0} for category in VOLUME_CATEGORIES}
+    for cell in cells:
+        rows.append(_row(organization_name, project_name, cell['block'], cell['floor'],
+                         cell['room_count'], cell['area'], cell['volumes']))
+        for category, volume in cell['volumes'].items():
+            totals[category]['total'] += volume['total']
+            totals[category]['completed'] += volume['completed']
+    rows.append(_row(organization_name, project_name, 'Итого', '',
+                     sum(cell['room_count'] for cell in cells), sum(cell['area'] for cell in cells), totals))
+    return rows, time.perf_counter() - start, os.getpid()
+
+
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8-sig')
+        self.writer = csv.writer(self.file, delimiter=';')
+
+    def append(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise CommandError('XLSX output requires openpyxl (pip install tablib[xlsx])')
+        self.path = path
+        # write_only пишет строки на диск по мере поступления, не держа лист в памяти
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet('Отчет')
+
+    def append(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.path)
+
+
+WRITERS = {'csv': CsvWriter, 'xlsx': XlsxWriter}
+
+
+class Command(BaseCommand):
+    help = 'Формирует отчет по выполнению и площадям для всех проектов параллельно'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Путь к файлу отчета (.csv или .xlsx)')
+        parser.add_argument('--workers', type=int, default=None, help='Количество процессов (по умолчанию - число ядер)')
+        parser.add_argument('--organization', type=int, help='Только проекты организации')
+
+    def handle(self, *args, **options):
+        output = options['output']
+        extension = os.path.splitext(output)[1].lstrip('.').lower()
+        if extension not in WRITERS:
+            raise CommandError('Output file must have .csv or .xlsx extension')
+
+        # Проекты организаций из TENANT_DATABASES лежат в своих базах, их читаем от имени организации
+        projects = []
+        for scope in tenant_scopes(options['organization']):
+            with tenant_context(organization_id=scope):
+                projects += [
+                    project + (scope,)
+                    for project in Project.objects.filter(scope_filter(scope)).values_list(
+                        'pk', 'name', 'organization__name'
+                    )
+                ]
+        projects.sort(key=lambda project: (project[2], project[1]))
+
+        writer = WRITERS[extension](output)
+        writer.append(HEADER)
+
+        # Дочерние процессы открывают собственные соединения, унаследованные использовать нельзя
+        connections.close_all()
+        start = time.perf_counter()
+        done = 0
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as executor:
+                # Результаты забираем в порядке сортировки проектов, а не по мере готовности,
+                # чтобы строки отчета шли в том же порядке при любом числе процессов
+                futures = [executor.submit(_project_report, *project) for project in projects]
+                for project, future in zip(projects, futures):
+                    rows, elapsed, pid = future.result()
+                    for row in rows:
+                        writer.append(row)
+                    done += 1
+                    self.stdout.write(
+                        f"[{done}/{len(projects)}] {project[1]}: {len(rows)} rows in {elapsed:.2f} s (pid {pid})"
+                    )
+        finally:
+            writer.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{done} projects in {elapsed:.1f} s ({done / elapsed if elapsed else 0:.1f} projects/s) -> {output}"
+        ))
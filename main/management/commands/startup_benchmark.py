@@ -0,0 +1,65 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Выполняется в отдельном процессе: полный холодный старт WSGI-приложения
+# с загрузкой URL-конфигурации, как при первом запросе к воркеру
+CHILD_SCRIPT = """
+import json, resource, time
+
+
+def peak_rss_kb():
+    # ru_maxrss на Linux наследуется от родителя через exec, поэтому читаем VmHWM самого процесса
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+start = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+elapsed = time.perf_counter() - start
+print(json.dumps({'setup': elapsed, 'rss_kb': peak_rss_kb()}))
+"""
+
+
+class Command(BaseCommand):
+    help = 'Измеряет время холодного старта и потребление памяти воркера для каждой роли'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--roles', nargs='+', default=['api', 'admin', 'all'], choices=['api', 'admin', 'all'])
+        parser.add_argument('--runs', type=int, default=5, help='Количество запусков на роль')
+
+    def handle(self, *args, **options):
+        for role in options['roles']:
+            totals, setups, rss = [], [], []
+            for _ in range(options['runs']):
+                env = dict(os.environ, WORKER_ROLE=role)
+                start = time.perf_counter()
+                result = subprocess.run(
+                    [sys.executable, '-c', CHILD_SCRIPT],
+                    cwd=settings.BASE_DIR, env=env, capture_output=True, text=True, check=True,
+                )
+                totals.append(time.perf_counter() - start)
+                data = json.loads(result.stdout.strip().splitlines()[-1])
+                setups.append(data['setup'])
+                rss.append(data['rss_kb'])
+
+            self.stdout.write(
+                f"{role:>5}: cold start {statistics.median(totals) * 1000:.0f} ms "
+                f"(django setup {statistics.median(setups) * 1000:.0f} ms), "
+                f"max RSS {max(rss) / 1024:.1f} MB"
+            )
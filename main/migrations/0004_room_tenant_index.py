@@ -0,0 +1,27 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0003_project_room_project'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='organization',
+            name='name',
+            field=models.CharField(max_length=255, verbose_name='Название'),
+        ),
+        migrations.AlterField(
+            model_name='project',
+            name='name',
+            field=models.CharField(max_length=255, verbose_name='Название'),
+        ),
+        migrations.AddIndex(
+            model_name='room',
+            index=models.Index(fields=['project', 'block', 'floor'], name='room_project_block_floor_idx'),
+        ),
+    ]
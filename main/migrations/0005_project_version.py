@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0004_room_tenant_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='project',
+            name='version',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Версия данных'),
+        ),
+    ]
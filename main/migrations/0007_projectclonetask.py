@@ -0,0 +1,35 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0006_bulkcompletionupdate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectCloneTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Название нового проекта')),
+                ('old_code_prefix', models.CharField(blank=True, max_length=50, verbose_name='Заменяемый префикс кода')),
+                ('new_code_prefix', models.CharField(max_length=50, verbose_name='Новый префикс кода')),
+                ('status', models.CharField(choices=[('pending', 'В очереди'), ('running', 'Выполняется'), ('done', 'Завершена'), ('failed', 'Ошибка')], default='pending', max_length=10, verbose_name='Статус')),
+                ('total', models.PositiveIntegerField(default=0, verbose_name='Всего записей')),
+                ('processed', models.PositiveIntegerField(default=0, verbose_name='Скопировано записей')),
+                ('error', models.TextField(blank=True, verbose_name='Ошибка')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Создана')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Завершена')),
+                ('source', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='clone_tasks', to='main.project', verbose_name='Исходный проект')),
+                ('target', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='main.project', verbose_name='Новый проект')),
+            ],
+            options={
+                'verbose_name': 'Копирование проекта',
+                'verbose_name_plural': 'Копирование проектов',
+            },
+        ),
+    ]
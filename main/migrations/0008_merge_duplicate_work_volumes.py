@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Max
+
+# Модели объемов и поле типа отделки, входящее в ключ элемента
+VOLUME_MODELS = (
+    ('FloorWorkVolume', 'floor_type'),
+    ('WallWorkVolume', 'wall_type'),
+    ('CeilingWorkVolume', 'ceiling_type'),
+)
+
+
+def merge_duplicates(apps, schema_editor):
+    """
+    Готовит данные к ограничениям из следующей миграции: из дублей (помещение, тип, номер элемента)
+    остается последняя запись, значения вне допустимых диапазонов приводятся к границам.
+    Все операции множественные, без обхода записей в Python.
+    """
+    for model_name, type_field in VOLUME_MODELS:
+        model = apps.get_model('main', model_name)
+        keep = model.objects.values('room', type_field, 'element_number').annotate(keep_id=Max('id')).values('keep_id')
+        model.objects.exclude(id__in=keep).delete()
+        model.objects.filter(completion_percentage__lt=0).update(completion_percentage=0)
+        model.objects.filter(completion_percentage__gt=100).update(completion_percentage=100)
+        model.objects.filter(volume__lt=0).update(volume=0)
+
+    Room = apps.get_model('main', 'Room')
+    Room.objects.filter(area__lt=0).update(area=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0007_projectclonetask'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicates, migrations.RunPython.noop),
+    ]
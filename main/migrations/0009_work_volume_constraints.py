@@ -0,0 +1,89 @@
+# Generated by Django 5.0.6 on 2026-10-19 11:32
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0008_merge_duplicate_work_volumes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='ceilingworkvolume',
+            name='completion_percentage',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Процент выполнения'),
+        ),
+        migrations.AlterField(
+            model_name='ceilingworkvolume',
+            name='volume',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Объем (м²)'),
+        ),
+        migrations.AlterField(
+            model_name='floorworkvolume',
+            name='completion_percentage',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Процент выполнения'),
+        ),
+        migrations.AlterField(
+            model_name='floorworkvolume',
+            name='volume',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Объем (м²)'),
+        ),
+        migrations.AlterField(
+            model_name='room',
+            name='area',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Площадь'),
+        ),
+        migrations.AlterField(
+            model_name='wallworkvolume',
+            name='completion_percentage',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(100)], verbose_name='Процент выполнения'),
+        ),
+        migrations.AlterField(
+            model_name='wallworkvolume',
+            name='volume',
+            field=models.FloatField(default=0, validators=[django.core.validators.MinValueValidator(0)], verbose_name='Объем (м²)'),
+        ),
+        migrations.AddConstraint(
+            model_name='ceilingworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('completion_percentage__gte', 0), ('completion_percentage__lte', 100)), name='ceilingworkvolume_completion_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='ceilingworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('volume__gte', 0)), name='ceilingworkvolume_volume_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='ceilingworkvolume',
+            constraint=models.UniqueConstraint(fields=('room', 'ceiling_type', 'element_number'), name='ceilingworkvolume_unique_element'),
+        ),
+        migrations.AddConstraint(
+            model_name='floorworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('completion_percentage__gte', 0), ('completion_percentage__lte', 100)), name='floorworkvolume_completion_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='floorworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('volume__gte', 0)), name='floorworkvolume_volume_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='floorworkvolume',
+            constraint=models.UniqueConstraint(fields=('room', 'floor_type', 'element_number'), name='floorworkvolume_unique_element'),
+        ),
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.CheckConstraint(check=models.Q(('area__gte', 0)), name='room_area_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('completion_percentage__gte', 0), ('completion_percentage__lte', 100)), name='wallworkvolume_completion_range'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallworkvolume',
+            constraint=models.CheckConstraint(check=models.Q(('volume__gte', 0)), name='wallworkvolume_volume_non_negative'),
+        ),
+        migrations.AddConstraint(
+            model_name='wallworkvolume',
+            constraint=models.UniqueConstraint(fields=('room', 'wall_type', 'element_number'), name='wallworkvolume_unique_element'),
+        ),
+    ]
@@ -1,6 +1,38 @@
+from django.conf import settings
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 
 
+class ProjectQuerySet(models.QuerySet):
+    def bump_version(self):
+        """Увеличивает версию проектов, сбрасывая кэшированные по версии данные"""
+        return self.update(version=models.F('version') + 1)
+
+
+class RoomQuerySet(models.QuerySet):
+    """Запросы помещений с ограничением по организации и проекту"""
+
+    def for_tenant(self, organization_id=None, project_id=None):
+        queryset = self
+        if organization_id is not None:
+            queryset = queryset.filter(project__organization_id=organization_id)
+        if project_id is not None:
+            queryset = queryset.filter(project_id=project_id)
+        return queryset
+
+
+class WorkVolumeQuerySet(models.QuerySet):
+    """Запросы объемов отделки с ограничением по организации и проекту"""
+
+    def for_tenant(self, organization_id=None, project_id=None):
+        queryset = self
+        if organization_id is not None:
+            queryset = queryset.filter(room__project__organization_id=organization_id)
+        if project_id is not None:
+            queryset = queryset.filter(room__project_id=project_id)
+        return queryset
+
+
 class Organization(models.Model):
     name = models.CharField(max_length=255, verbose_name='Название')
 
@@ -15,6 +47,9 @@ class Organization(models.Model):
 class Project(models.Model):
     name = models.CharField(max_length=255, verbose_name='Название')
     organization = models.ForeignKey(Organization, on_delete=models.CASCADE, verbose_name='Организация')
+    version = models.PositiveIntegerField('Версия данных', default=0, editable=False)
+
+    objects = ProjectQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -32,7 +67,16 @@ class Room(models.Model):
     floor = models.IntegerField('Этаж', blank=True)
     room_number = models.CharField('Номер помещения', max_length=50, blank=True)
     name = models.CharField('Наименование', max_length=255, blank=False)
-    area = models.FloatField('Площадь', default=0)
+    area = models.FloatField('Площадь', default=0, validators=[MinValueValidator(0)])
+
+    objects = RoomQuerySet.as_manager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Проект при загрузке, чтобы при переносе помещения обновить версию и старого проекта
+        instance._loaded_project_id = instance.__dict__.get('project_id')
+        return instance
 
     def __str__(self):
         return f"{self.code} - {self.name}"
@@ -40,6 +84,12 @@ class Room(models.Model):
     class Meta:
         verbose_name = 'Помещение'
         verbose_name_plural = 'Помещения'
+        indexes = [
+            models.Index(fields=['project', 'block', 'floor'], name='room_project_block_floor_idx'),
+        ]
+        constraints = [
+            models.CheckConstraint(check=models.Q(area__gte=0), name='room_area_non_negative'),
+        ]
 
 
 class WorkType(models.Model):
@@ -105,10 +155,13 @@ class WorkVolume(models.Model):
     """Базовая модель объема отделки"""
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name="%(class)s_volumes")
     element_number = models.IntegerField('Номер элемента')
-    volume = models.FloatField('Объем (м²)', default=0)  # Общий объем
-    completion_percentage = models.FloatField('Процент выполнения', default=0)  # В процентах
+    volume = models.FloatField('Объем (м²)', default=0, validators=[MinValueValidator(0)])  # Общий объем
+    completion_percentage = models.FloatField('Процент выполнения', default=0,
+                                              validators=[MinValueValidator(0), MaxValueValidator(100)])  # В процентах
     unit = models.CharField('Ед. изм.', max_length=10, default='м²')
 
+    objects = WorkVolumeQuerySet.as_manager()
+
     @property
     def completed_volume(self):
         """Вычисляет выполненный объем"""
@@ -119,6 +172,13 @@ class WorkVolume(models.Model):
 
     class Meta:
         abstract = True  # Базовая модель, не создаёт таблицу
+        constraints = [
+            models.CheckConstraint(
+                check=models.Q(completion_percentage__gte=0, completion_percentage__lte=100),
+                name='%(class)s_completion_range',
+            ),
+            models.CheckConstraint(check=models.Q(volume__gte=0), name='%(class)s_volume_non_negative'),
+        ]
 
 
 class FloorWorkVolume(WorkVolume):
@@ -126,9 +186,13 @@ class FloorWorkVolume(WorkVolume):
     floor_type = models.ForeignKey(FloorType, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='floorworkvolume_volumes')
 
-    class Meta:
+    class Meta(WorkVolume.Meta):
         verbose_name = 'Объем отделки пола'
         verbose_name_plural = 'Объемы отделки полов'
+        constraints = WorkVolume.Meta.constraints + [
+            # Уникальность элемента в помещении, используется как ключ upsert в update-room
+            models.UniqueConstraint(fields=['room', 'floor_type', 'element_number'], name='%(class)s_unique_element'),
+        ]
 
 
 class WallWorkVolume(WorkVolume):
@@ -136,9 +200,12 @@ class WallWorkVolume(WorkVolume):
     wall_type = models.ForeignKey(WallType, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='wallworkvolume_volumes')
 
-    class Meta:
+    class Meta(WorkVolume.Meta):
         verbose_name = 'Объем отделки стен'
         verbose_name_plural = 'Объемы отделки стен'
+        constraints = WorkVolume.Meta.constraints + [
+            models.UniqueConstraint(fields=['room', 'wall_type', 'element_number'], name='%(class)s_unique_element'),
+        ]
 
 
 class CeilingWorkVolume(WorkVolume):
@@ -146,6 +213,68 @@ class CeilingWorkVolume(WorkVolume):
     ceiling_type = models.ForeignKey(CeilingType, on_delete=models.CASCADE)
     room = models.ForeignKey(Room, on_delete=models.CASCADE, related_name='ceilingworkvolume_volumes')
 
-    class Meta:
+    class Meta(WorkVolume.Meta):
         verbose_name = 'Объем отделки потолков'
-        verbose_name_plural = 'Объемы отделки потолков'
\ No newline at end of file
+        verbose_name_plural = 'Объемы отделки потолков'
+        constraints = WorkVolume.Meta.constraints + [
+            models.UniqueConstraint(fields=['room', 'ceiling_type', 'element_number'], name='%(class)s_unique_element'),
+        ]
+
+
+class BulkCompletionUpdate(models.Model):
+    """Журнал массовых изменений процента выполнения"""
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, verbose_name='Проект')
+    # Пользователи всегда в базе 'default', а журнал может храниться в базе организации
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+                             db_constraint=False, verbose_name='Пользователь')
+    selector = models.JSONField('Условия отбора', default=dict)
+    completion_percentage = models.FloatField('Процент выполнения')
+    affected_rows = models.JSONField('Изменено записей', default=dict)
+    created_at = models.DateTimeField('Дата', auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.project} - {self.completion_percentage}% ({self.created_at:%Y-%m-%d %H:%M})"
+
+    class Meta:
+        verbose_name = 'Массовое изменение выполнения'
+        verbose_name_plural = 'Массовые изменения выполнения'
+
+
+class ProjectCloneTask(models.Model):
+    """Фоновая задача копирования проекта со всеми помещениями и объемами"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Завершена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    source = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='clone_tasks',
+                               verbose_name='Исходный проект')
+    target = models.ForeignKey(Project, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                               verbose_name='Новый проект')
+    name = models.CharField('Название нового проекта', max_length=255)
+    old_code_prefix = models.CharField('Заменяемый префикс кода', max_length=50, blank=True)
+    new_code_prefix = models.CharField('Новый префикс кода', max_length=50)
+    status = models.CharField('Статус', max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    total = models.PositiveIntegerField('Всего записей', default=0)
+    processed = models.PositiveIntegerField('Скопировано записей', default=0)
+    error = models.TextField('Ошибка', blank=True)
+    created_at = models.DateTimeField('Создана', auto_now_add=True)
+    finished_at = models.DateTimeField('Завершена', null=True, blank=True)
+
+    @property
+    def progress(self):
+        """Процент выполнения задачи"""
+        return round(self.processed * 100 / self.total, 1) if self.total else 0
+
+    def __str__(self):
+        return f"{self.source} -> {self.name} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = 'Копирование проекта'
+        verbose_name_plural = 'Копирование проектов'
@@ -0,0 +1,46 @@
+from django.conf import settings
+
+from .tenancy import get_current_tenant
+
+# Приложения, данные которых разделяются по организациям. Пользователи, сессии,
+# contenttypes и прочие служебные таблицы всегда остаются в базе 'default'.
+TENANT_APP_LABELS = {'main', 'api'}
+
+
+def _is_tenant_model(model):
+    return model._meta.app_label in TENANT_APP_LABELS
+
+
+class TenantRouter:
+    """
+    Направляет запросы крупных организаций в отдельную базу данных.
+    Соответствие задается в settings.TENANT_DATABASES: {id организации: алиас базы}.
+    Маршрутизируются только модели приложений main и api, для остальных моделей
+    и организаций решение остается за Django (база 'default').
+    """
+
+    def _db_for_tenant(self, model):
+        if not _is_tenant_model(model):
+            return None
+        organization_id = get_current_tenant().organization_id
+        if organization_id is None:
+            return None
+        return getattr(settings, 'TENANT_DATABASES', {}).get(organization_id)
+
+    def db_for_read(self, model, **hints):
+        return self._db_for_tenant(model)
+
+    def db_for_write(self, model, **hints):
+        return self._db_for_tenant(model)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ссылки из данных организации на общие таблицы (например, на пользователя) допустимы
+        if _is_tenant_model(obj1) != _is_tenant_model(obj2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # В базах организаций создаются только таблицы main и api
+        if db in getattr(settings, 'TENANT_DATABASES', {}).values():
+            return app_label in TENANT_APP_LABELS
+        return None
@@ -0,0 +1,117 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import router, transaction
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import (Room, Project, FloorType, WallType, CeilingType,
+                     FloorWorkVolume, WallWorkVolume, CeilingWorkVolume)
+
+# Отправляется массовыми операциями, которые обходят post_save (update, bulk_create).
+# Аргумент rooms - queryset затронутых помещений.
+rooms_bulk_changed = Signal()
+
+_batched_rooms = ContextVar('batched_room_changes', default=None)
+
+
+def defer_room_change(room_id):
+    """Запоминает помещение внутри batched_room_changes, вне блока возвращает False"""
+    pending = _batched_rooms.get()
+    if pending is None:
+        return False
+    pending.add(room_id)
+    return True
+
+
+@contextmanager
+def batched_room_changes(sender):
+    """
+    Собирает помещения, измененные построчными сохранениями внутри блока (например, inline-формы
+    админки), и в конце отправляет по ним один rooms_bulk_changed. Используется внутри transaction.atomic.
+    """
+    if _batched_rooms.get() is not None:
+        yield
+        return
+    pending = set()
+    token = _batched_rooms.set(pending)
+    try:
+        yield
+    finally:
+        _batched_rooms.reset(token)
+    if pending:
+        rooms_bulk_changed.send(sender=sender, rooms=Room.objects.filter(pk__in=pending))
+
+
+class _VersionBumps:
+    """Проекты (и помещения, по которым их искать), версию которых нужно увеличить при фиксации"""
+
+    def __init__(self):
+        self.project_ids = set()
+        self.room_ids = set()
+        self.all_projects = False
+
+    def update(self, project_ids, room_ids, all_projects):
+        self.project_ids.update(project_ids)
+        self.room_ids.update(room_ids)
+        self.all_projects |= all_projects
+
+    def __call__(self):
+        if self.all_projects:
+            Project.objects.bump_version()
+        else:
+            Project.objects.filter(Q(pk__in=self.project_ids) | Q(room__in=self.room_ids)).bump_version()
+
+
+def _bump_on_commit(project_ids=(), room_ids=(), all_projects=False):
+    """
+    Увеличивает версию проектов один раз за транзакцию, сколько бы записей в ней ни менялось.
+    Вне транзакции версия увеличивается сразу.
+    """
+    using = router.db_for_write(Project)
+    connection = transaction.get_connection(using)
+    bumps = next((entry[1] for entry in connection.run_on_commit if isinstance(entry[1], _VersionBumps)), None)
+    if bumps is None:
+        bumps = _VersionBumps()
+        bumps.update(project_ids, room_ids, all_projects)
+        # Вне транзакции on_commit выполняет функцию сразу, поэтому она регистрируется уже заполненной
+        transaction.on_commit(bumps, using=using)
+    else:
+        bumps.update(project_ids, room_ids, all_projects)
+
+
+def _is_cascade(instance, kwargs):
+    # При каскадном удалении версию увеличивает (или удаляет) сам удаляемый объект
+    origin = kwargs.get('origin')
+    return origin is not None and origin is not instance
+
+
+@receiver([post_save, post_delete], sender=Room)
+def bump_room_project_version(sender, instance, **kwargs):
+    if _is_cascade(instance, kwargs):
+        return
+    project_ids = {instance.project_id}
+    # При переносе помещения в другой проект меняются оба проекта
+    loaded_project_id = getattr(instance, '_loaded_project_id', None)
+    if loaded_project_id is not None:
+        project_ids.add(loaded_project_id)
+    instance._loaded_project_id = instance.project_id
+    _bump_on_commit(project_ids=project_ids)
+
+
+@receiver([post_save, post_delete], sender=FloorWorkVolume)
+@receiver([post_save, post_delete], sender=WallWorkVolume)
+@receiver([post_save, post_delete], sender=CeilingWorkVolume)
+def bump_volume_project_version(sender, instance, **kwargs):
+    if _is_cascade(instance, kwargs):
+        return
+    _bump_on_commit(room_ids={instance.room_id})
+
+
+@receiver([post_save, post_delete], sender=FloorType)
+@receiver([post_save, post_delete], sender=WallType)
+@receiver([post_save, post_delete], sender=CeilingType)
+def bump_finish_type_projects_version(sender, instance, **kwargs):
+    # Справочники типов отделки входят в офлайн-пакет каждого проекта
+    _bump_on_commit(all_projects=True)
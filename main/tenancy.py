@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.db.models import Q
+from django.http import JsonResponse
+
+
+@dataclass(frozen=True)
+class Tenant:
+    """Организация и проект, от имени которых выполняется запрос"""
+    organization_id: int | None = None
+    project_id: int | None = None
+
+
+_current_tenant = ContextVar('current_tenant', default=Tenant())
+
+
+def get_current_tenant():
+    return _current_tenant.get()
+
+
+def set_current_tenant(tenant):
+    """Устанавливает текущего арендатора, возвращает токен для сброса"""
+    return _current_tenant.set(tenant)
+
+
+def reset_current_tenant(token):
+    _current_tenant.reset(token)
+
+
+@contextmanager
+def tenant_context(organization_id=None, project_id=None):
+    """Выполняет блок от имени организации: для команд и фоновых задач вне запроса"""
+    token = set_current_tenant(Tenant(organization_id=organization_id, project_id=project_id))
+    try:
+        yield
+    finally:
+        reset_current_tenant(token)
+
+
+def tenant_scopes(organization_id=None):
+    """
+    Области данных, которые команды вне запроса обходят по отдельности: None - организации
+    базы 'default', затем каждая организация из TENANT_DATABASES. С organization_id - только она.
+    """
+    if organization_id is not None:
+        return [organization_id]
+    return [None] + list(settings.TENANT_DATABASES)
+
+
+def scope_filter(scope, lookup='organization_id'):
+    """Условие на организацию для области из tenant_scopes"""
+    if scope is None:
+        return ~Q(**{f'{lookup}__in': list(settings.TENANT_DATABASES)})
+    return Q(**{lookup: scope})
+
+
+def _parse_id(value):
+    if value in (None, ''):
+        return None
+    return int(value)
+
+
+class TenantMiddleware:
+    """
+    Определяет организацию и проект по заголовкам X-Organization-Id и X-Project-Id.
+    Это необязательное ограничение выборки, а не разграничение доступа: заголовки задает
+    клиент, пользователь с организацией не связан. Без заголовков запрос не ограничивается.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        try:
+            tenant = Tenant(
+                organization_id=_parse_id(request.headers.get('X-Organization-Id')),
+                project_id=_parse_id(request.headers.get('X-Project-Id')),
+            )
+        except ValueError:
+            return JsonResponse({'detail': 'Invalid tenant header'}, status=400)
+
+        request.tenant = tenant
+        token = set_current_tenant(tenant)
+        try:
+            return self.get_response(request)
+        finally:
+            reset_current_tenant(token)
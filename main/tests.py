@@ -0,0 +1,116 @@
+import sqlite3
+import tempfile
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from .bulk import bulk_set_completion
+from .bundles import BundleError, apply_diff_bundle
+from .models import (Organization, Project, Room, FloorType, WallType, CeilingType,
+                     FloorWorkVolume, BulkCompletionUpdate)
+from .tenancy import Tenant, set_current_tenant, reset_current_tenant
+
+TENANT_ID = 5
+# База 'tenant' есть только в smc_room_decoration.settings_test
+HAS_TENANT_DATABASE = 'tenant' in settings.DATABASES
+
+
+@skipUnless(HAS_TENANT_DATABASE, 'requires smc_room_decoration.settings_test')
+@override_settings(TENANT_DATABASES={TENANT_ID: 'tenant'})
+class RoutedTenantTestCase(TestCase):
+    """Организация TENANT_ID маршрутизируется в базу 'tenant', запись в 'default' не попадает"""
+    databases = {'default', 'tenant'} if HAS_TENANT_DATABASE else {'default'}
+
+    def setUp(self):
+        self.addCleanup(reset_current_tenant, set_current_tenant(Tenant(organization_id=TENANT_ID)))
+        organization = Organization.objects.create(pk=TENANT_ID, name='Крупная организация')
+        self.project = Project.objects.create(name='Проект', organization=organization)
+        self.room = Room.objects.create(project=self.project, code='A-1', block='A', floor=1, name='Офис', area=10)
+        self.floor_type = FloorType.objects.create(type_code='F1', description='', rough_finish='', clean_finish='')
+        self.wall_type = WallType.objects.create(type_code='W1', description='', rough_finish='', clean_finish='')
+        self.ceiling_type = CeilingType.objects.create(type_code='C1', description='', rough_finish='',
+                                                       clean_finish='')
+        self.floor_volume = FloorWorkVolume.objects.create(room=self.room, floor_type=self.floor_type,
+                                                           element_number=1, volume=10, completion_percentage=0)
+
+    def assertFloorVolume(self, **values):
+        volume = FloorWorkVolume.objects.using('tenant').get(pk=self.floor_volume.pk)
+        for field, value in values.items():
+            self.assertEqual(getattr(volume, field), value)
+
+
+class TenantRouterTests(RoutedTenantTestCase):
+
+    def test_data_is_routed(self):
+        self.assertTrue(Room.objects.using('tenant').filter(pk=self.room.pk).exists())
+        self.assertFalse(Room.objects.using('default').exists())
+
+
+class BulkSetCompletionTenantTests(RoutedTenantTestCase):
+
+    def test_update_and_audit_are_atomic(self):
+        with mock.patch.object(BulkCompletionUpdate.objects, 'create', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                bulk_set_completion(self.project, 100, category='floor')
+        self.assertFloorVolume(completion_percentage=0)
+
+    def test_update_writes_audit_to_tenant_database(self):
+        affected = bulk_set_completion(self.project, 100, category='floor')
+        self.assertEqual(affected, {'floor': 1})
+        self.assertFloorVolume(completion_percentage=100)
+        self.assertEqual(BulkCompletionUpdate.objects.using('tenant').count(), 1)
+
+
+class DiffBundleTenantTests(RoutedTenantTestCase):
+
+    def make_bundle(self, tables):
+        with tempfile.NamedTemporaryFile(suffix='.sqlite') as tmp:
+            db = sqlite3.connect(tmp.name)
+            for table, (type_field, rows) in tables.items():
+                db.execute(f'CREATE TABLE {table} (room_id, {type_field}, element_number, volume, '
+                           f'completion_percentage)')
+                db.executemany(f'INSERT INTO {table} VALUES (?, ?, ?, ?, ?)', rows)
+            db.commit()
+            db.close()
+            return SimpleUploadedFile('diff.sqlite', tmp.read())
+
+    def test_failed_category_rolls_back_previous_categories(self):
+        bundle = self.make_bundle({
+            'floor_volumes': ('floor_type_id', [(self.room.pk, self.floor_type.pk, 1, 10, 80)]),
+            'wall_volumes': ('wall_type_id', [(self.room.pk, self.wall_type.pk, 1, 10, 150)]),
+        })
+        with self.assertRaises(BundleError):
+            apply_diff_bundle(self.project, bundle)
+        self.assertFloorVolume(completion_percentage=0)
+
+
+@skipUnless(HAS_TENANT_DATABASE, 'requires smc_room_decoration.settings_test')
+@override_settings(TENANT_DATABASES={TENANT_ID: 'tenant'})
+class FinishTypeVersionTests(TransactionTestCase):
+    """Версии проектов увеличиваются при фиксации, поэтому транзакции здесь настоящие"""
+    databases = {'default', 'tenant'} if HAS_TENANT_DATABASE else {'default'}
+
+    def setUp(self):
+        self.addCleanup(reset_current_tenant, set_current_tenant(Tenant(organization_id=TENANT_ID)))
+        organization = Organization.objects.create(pk=TENANT_ID, name='Крупная организация')
+        self.project = Project.objects.create(name='Проект', organization=organization)
+        self.floor_type = FloorType.objects.create(type_code='F1', description='', rough_finish='', clean_finish='')
+
+    def get_version(self):
+        return Project.objects.using('tenant').get(pk=self.project.pk).version
+
+    def test_finish_type_change_bumps_project_versions(self):
+        version = self.get_version()
+        self.floor_type.description = 'Керамогранит'
+        self.floor_type.save()
+        self.assertEqual(self.get_version(), version + 1)
+
+    def test_changes_in_one_transaction_bump_once(self):
+        version = self.get_version()
+        with transaction.atomic(using='tenant'):
+            self.floor_type.save()
+            self.floor_type.delete()
+        self.assertEqual(self.get_version(), version + 1)
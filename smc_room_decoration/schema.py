@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import translation
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.response import Response
+
+
+class CachedSpectacularAPIView(SpectacularAPIView):
+    """Генерирует OpenAPI-схему один раз и дальше отдает ее из кэша"""
+
+    def _get_schema_response(self, request):
+        version = self.api_version or request.version or self._get_version_parameter(request)
+        cache_key = f'openapi-schema:{settings.BUILD_ID}:{version}:{translation.get_language()}'
+        schema = cache.get(cache_key)
+        if schema is None:
+            generator = self.generator_class(urlconf=self.urlconf, api_version=version, patterns=self.patterns)
+            schema = generator.get_schema(request=request, public=self.serve_public)
+            cache.set(cache_key, schema, settings.SCHEMA_CACHE_TIMEOUT)
+        return Response(
+            data=schema,
+            headers={"Content-Disposition": f'inline; filename="{self._get_filename(request, version)}"'}
+        )
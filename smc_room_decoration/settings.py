@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 import os
+import time
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -29,8 +30,16 @@ ALLOWED_HOSTS = []
 
 # Application definition
 
+# Роль воркера: 'api' - только API, 'admin' - админка и документация API, 'all' - всё сразу.
+# API-воркеры не загружают админку, import_export и drf_spectacular, что ускоряет холодный старт.
+WORKER_ROLE = os.environ.get('WORKER_ROLE', 'all')
+if WORKER_ROLE not in ('api', 'admin', 'all'):
+    raise ValueError(f"Unknown WORKER_ROLE: {WORKER_ROLE}")
+
+SERVE_API = WORKER_ROLE in ('api', 'all')
+SERVE_ADMIN = WORKER_ROLE in ('admin', 'all')
+
 INSTALLED_APPS = [
-    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -40,12 +49,12 @@ INSTALLED_APPS = [
     'api',
     'main',
     'users',
-    'import_export',
-    'drf_spectacular',
 ]
-REST_FRAMEWORK = {
-    'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
-}
+REST_FRAMEWORK = {}
+
+if SERVE_ADMIN:
+    INSTALLED_APPS = ['django.contrib.admin'] + INSTALLED_APPS + ['import_export', 'drf_spectacular']
+    REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
@@ -55,6 +64,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'main.tenancy.TenantMiddleware',
 ]
 
 ROOT_URLCONF = 'smc_room_decoration.urls'
@@ -87,6 +97,31 @@ DATABASES = {
     }
 }
 
+# Маршрутизация крупных организаций в отдельные базы: {id организации: алиас из DATABASES}
+DATABASE_ROUTERS = ['main.routers.TenantRouter']
+TENANT_DATABASES = {}
+
+# Сводка здание × этаж кэшируется по версии проекта, таймаут лишь ограничивает время жизни старых версий
+FLOOR_GRID_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Размер пачки помещений при копировании проекта
+CLONE_CHUNK_SIZE = 2000
+
+# Денормализованная модель чтения помещений: готовые ответы RoomSerializer в api.RoomDocument.
+# После включения документы нужно построить командой rebuild_room_documents.
+ROOM_READ_MODEL_ENABLED = False
+ROOM_READ_MODEL_BATCH_SIZE = 500
+# Если операция меняет больше помещений, их документы пересчитываются в фоне после фиксации
+ROOM_READ_MODEL_SYNC_LIMIT = 100
+
+# Офлайн-пакеты проектов для планшетов (SQLite + gzip), по одному файлу на версию проекта
+BUNDLE_ROOT = BASE_DIR / 'bundles'
+BUNDLE_CHUNK_SIZE = 5000
+# Сколько секунд запрос ждет пакет, который собирает другой запрос
+BUNDLE_BUILD_TIMEOUT = 300
+# Максимальный размер пакета изменений с устройства после распаковки
+BUNDLE_MAX_UPLOAD_SIZE = 200 * 1024 * 1024
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 
@@ -139,3 +174,10 @@ SPECTACULAR_SETTINGS = {
         "name": "BSD License",
     },
 }
+
+# Идентификатор сборки, входит в ключ кэша OpenAPI-схемы, чтобы после деплоя не отдавалась старая схема
+# из общего кэша. Задается при деплое; без него каждый запуск воркера считается новой сборкой.
+BUILD_ID = os.environ.get('BUILD_ID') or str(time.time_ns())
+
+# Время хранения сгенерированной OpenAPI-схемы в кэше
+SCHEMA_CACHE_TIMEOUT = 60 * 60 * 24
@@ -0,0 +1,11 @@
+"""
+Настройки для тестов: python manage.py test --settings=smc_room_decoration.settings_test
+Добавляют вторую базу 'tenant', в которую тесты направляют организацию через TENANT_DATABASES.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES
+
+DATABASES['tenant'] = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'NAME': BASE_DIR / 'tenant.sqlite3',
+}
@@ -1,19 +1,29 @@
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
-# Представление для схемы
-schema_view = SpectacularAPIView.as_view()
+urlpatterns = []
 
-urlpatterns = [
-    path('admin/', admin.site.urls),
-    path('api/', include('api.urls')),
-    path('api-auth/', include('rest_framework.urls')),  # Для встроенной аутентификации DRF
+if settings.SERVE_API:
+    urlpatterns += [
+        path('', include('smc_room_decoration.urls_api')),
+    ]
 
-    # Эндпоинт для получения схемы в формате JSON или YAML
-    path('swagger/', SpectacularSwaggerView.as_view(url_name='schema-json'), name='schema-swagger-ui'),
+if settings.SERVE_ADMIN:
+    # Админка и инструменты схемы импортируются только воркерами с ролью admin/all
+    from django.contrib import admin
+    from drf_spectacular.views import SpectacularSwaggerView, SpectacularRedocView
+    from .schema import CachedSpectacularAPIView
 
-    # Эндпоинт для отображения схемы в формате JSON или YAML (не используйте re_path)
-    path('schema/', schema_view, name='schema-json'),  # это будет ваш endpoint для схемы
-    path('redoc/', SpectacularRedocView.as_view(url_name='schema-json'), name='schema-redoc'),
-]
+    # Представление для схемы: схема строится по URL-ам API, даже если воркер их не обслуживает
+    schema_view = CachedSpectacularAPIView.as_view(urlconf='smc_room_decoration.urls_api')
+
+    urlpatterns += [
+        path('admin/', admin.site.urls),
+
+        # Эндпоинт для получения схемы в формате JSON или YAML
+        path('swagger/', SpectacularSwaggerView.as_view(url_name='schema-json'), name='schema-swagger-ui'),
+
+        # Эндпоинт для отображения схемы в формате JSON или YAML (не используйте re_path)
+        path('schema/', schema_view, name='schema-json'),  # это будет ваш endpoint для схемы
+        path('redoc/', SpectacularRedocView.as_view(url_name='schema-json'), name='schema-redoc'),
+    ]
@@ -0,0 +1,6 @@
+from django.urls import path, include
+
+urlpatterns = [
+    path('api/', include('api.urls')),
+    path('api-auth/', include('rest_framework.urls')),  # Для встроенной аутентификации DRF
+]